@@ -1,14 +1,32 @@
 import os
+import sys
 import json
-from datetime import datetime, timezone, timedelta, time as dt_time
-from typing import Tuple, Dict, List
+from datetime import datetime, timezone, timedelta
+from typing import Tuple, Dict, Iterable, Iterator
 
 try:
     from zoneinfo import ZoneInfo  # Python 3.9+
 except ModuleNotFoundError:
     raise RuntimeError("This script requires Python 3.9+ (zoneinfo). Please upgrade Python.")
 
+try:
+    import orjson  # optional C-accelerated JSON
+    _loads = orjson.loads
+    def _dumps(data) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+    def _dumps(data) -> bytes:
+        return json.dumps(data, indent=2).encode("utf-8")
+
+try:
+    import ijson  # optional streaming parser for completed-item pages
+except ImportError:
+    ijson = None
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # === Config ===
 API_TOKEN = os.getenv("TODOIST_API_KEY")
@@ -18,18 +36,35 @@ if not API_TOKEN:
 LEADERBOARD_PATH = "leaderboard.json"
 PROJECT_NAMES = ["Julia", "Chris"]
 PAGE_SIZE = 200
+PROJECTS_CACHE_TTL_S = 3600  # project IDs almost never change
 
 HEADERS = {"Authorization": f"Bearer {API_TOKEN}", "Accept": "application/json"}
 SYNC_COMPLETED_URL = "https://api.todoist.com/sync/v9/completed/get_all"  # completed history (Sync API)
 REST_PROJECTS_URL  = "https://api.todoist.com/rest/v2/projects"          # project IDs/names (REST v2)
 
+# One pooled session for every Todoist call: keeps the TLS connection alive across
+# pagination and retries 429/5xx with exponential backoff.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
 NY_TZ = ZoneInfo("America/New_York")
+FRIDAY_OFFSET = (4, 3, 2, 1, 0, 6, 5)  # days from weekday() (Mon=0) to the next Friday
 
-def parse_iso_utc(s: str) -> datetime:
-    return datetime.fromisoformat(s.replace("Z", "+00:00"))
+if sys.version_info >= (3, 11):
+    # 3.11+ fromisoformat accepts the trailing 'Z' natively
+    parse_iso_utc = datetime.fromisoformat
+else:
+    def parse_iso_utc(s: str) -> datetime:
+        return datetime.fromisoformat(s.replace("Z", "+00:00"))
 
 def iso_utc(dt: datetime) -> str:
-    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    u = dt.astimezone(timezone.utc)
+    return f"{u.year:04d}-{u.month:02d}-{u.day:02d}T{u.hour:02d}:{u.minute:02d}:{u.second:02d}Z"
 
 def today_midnight_et_utc(now_utc: datetime) -> datetime:
     now_local = now_utc.astimezone(NY_TZ)
@@ -38,9 +73,9 @@ def today_midnight_et_utc(now_utc: datetime) -> datetime:
 
 def next_friday_235959_utc(now_utc: datetime) -> datetime:
     now_local = now_utc.astimezone(NY_TZ)
-    days_ahead = (4 - now_local.weekday()) % 7  # Mon=0..Fri=4
-    tgt_date = now_local.date() + timedelta(days=days_ahead)
-    tgt_local = datetime.combine(tgt_date, dt_time(23, 59, 59), NY_TZ)
+    tgt_local = now_local.replace(hour=23, minute=59, second=59, microsecond=0) + timedelta(
+        days=FRIDAY_OFFSET[now_local.weekday()]
+    )
     if tgt_local <= now_local:
         tgt_local += timedelta(days=7)
     return tgt_local.astimezone(timezone.utc)
@@ -55,8 +90,8 @@ def load_state(path: str) -> dict:
             "last_sync": iso_utc(today_midnight_et_utc(now_utc)),
             "next_reset_utc": iso_utc(next_friday_235959_utc(now_utc)),
         }
-    with open(path, "r") as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        data = _loads(f.read())
     data.setdefault("points", {"Julia": 0, "Chris": 0})
     data.setdefault("previous_points", {"Julia": 0, "Chris": 0})
     if "last_sync" not in data:
@@ -69,85 +104,145 @@ def load_state(path: str) -> dict:
     return data
 
 def save_state(path: str, data: dict):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    payload = _dumps(data)
+    # Idle runs produce identical state; leave the file untouched
+    try:
+        with open(path, "rb") as f:
+            if f.read() == payload:
+                return
+    except FileNotFoundError:
+        pass
+    # Write to a temp file and swap it in so a crash never leaves a torn leaderboard.json
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
 
 def fetch_projects_maps() -> Tuple[Dict[str, str], Dict[str, str]]:
-    r = requests.get(REST_PROJECTS_URL, headers=HEADERS)
+    r = SESSION.get(REST_PROJECTS_URL)
     r.raise_for_status()
     projs = r.json()
     id_to_name = {p["id"]: p["name"] for p in projs}
     name_to_id = {p["name"]: p["id"] for p in projs}
     return id_to_name, name_to_id
 
-def fetch_completed(since_dt: datetime, until_dt: datetime | None, project_id: str | None) -> List[dict]:
+def cached_project_ids(state: dict) -> Dict[str, str]:
     """
-    Pull completed items with server 'since' (and 'until' if provided) + pagination.
-    If server rejects project filter, we remove it and filter client-side.
+    Name -> id for PROJECT_NAMES, cached in state for PROJECTS_CACHE_TTL_S.
+    Only the tracked projects are stored, since leaderboard.json is published.
+    """
+    now_utc = datetime.now(timezone.utc)
+    cache = state.get("_projects_cache")
+    if (
+        cache
+        and (now_utc - parse_iso_utc(cache["fetched_at"])).total_seconds() < PROJECTS_CACHE_TTL_S
+        and all(n in cache["map"] for n in PROJECT_NAMES)
+    ):
+        return cache["map"]
+
+    _, name_to_id = fetch_projects_maps()
+    for p in PROJECT_NAMES:
+        if p not in name_to_id:
+            raise RuntimeError(f"Project '{p}' not found in Todoist.")
+    tracked = {p: name_to_id[p] for p in PROJECT_NAMES}
+    state["_projects_cache"] = {"map": tracked, "fetched_at": iso_utc(now_utc)}
+    return tracked
+
+def iter_page_items(r: requests.Response) -> Iterator[dict]:
+    """Items of one completed-items page, streamed straight off the socket when ijson is available."""
+    if ijson is not None:
+        r.raw.decode_content = True
+        return ijson.items(r.raw, "items.item")
+    return iter(_loads(r.content).get("items", []))
+
+def fetch_completed(since_dt: datetime, until_dt: datetime | None) -> Iterator[dict]:
+    """
+    Yield completed items (all projects) with server 'since' (and 'until' if provided) + pagination.
     """
-    items: List[dict] = []
     offset = 0
     base_params = {
         "since": iso_utc(since_dt),
         "limit": PAGE_SIZE,
         "offset": offset,
-        "annotate_items": "true",
     }
     if until_dt:
         base_params["until"] = iso_utc(until_dt)
 
-    use_pid = project_id is not None
     while True:
-        params = dict(base_params)
-        if use_pid:
-            params["project_id"] = project_id
-        r = requests.get(SYNC_COMPLETED_URL, headers=HEADERS, params=params)
-        if r.status_code != 200 and use_pid:
-            # fallback without project filter
-            use_pid = False
-            r = requests.get(SYNC_COMPLETED_URL, headers=HEADERS, params=base_params)
+        r = SESSION.get(SYNC_COMPLETED_URL, params=base_params, stream=True)
         r.raise_for_status()
-        payload = r.json()
-        batch = payload.get("items", [])
-        items.extend(batch)
-        if len(batch) < PAGE_SIZE:
+        count = 0
+        try:
+            for it in iter_page_items(r):
+                count += 1
+                yield it
+        finally:
+            r.close()
+        if count < PAGE_SIZE:
             break
         offset += PAGE_SIZE
         base_params["offset"] = offset
 
-    if project_id and not use_pid:
-        items = [it for it in items if it.get("project_id") == project_id]
-    return items
-
-def count_window(state: dict, start_dt: datetime, end_dt: datetime, julia_id: str, chris_id: str) -> dict:
+def fetch_completed_multi(since_dt: datetime, until_dt: datetime | None, project_ids: set[str]) -> Iterator[dict]:
     """
-    Count completions in (start_dt, end_dt] for Julia & Chris (strictly after start_dt).
+    One unfiltered sweep for all tracked projects, partitioned client-side.
+    Trade-off: a window whose completions (all projects) fit in one page costs a single
+    request instead of one per project, but busy untracked projects add pages to the sweep.
     """
-    combined: dict[str, dict] = {}
-    for pid in (julia_id, chris_id):
-        for it in fetch_completed(start_dt, end_dt, pid):
-            iid = it.get("id")
-            if iid:
-                combined[iid] = it
+    return (it for it in fetch_completed(since_dt, until_dt) if it.get("project_id") in project_ids)
 
+def tally(items: Iterable[dict], julia_id: str, chris_id: str, start_dt: datetime, end_dt: datetime) -> Tuple[int, int, datetime]:
+    """
+    Count items completed in (start_dt, end_dt] per child.
+    Returns (julia_count, chris_count, latest completion seen or start_dt).
+    """
     max_seen = start_dt
-    added = {"Julia": 0, "Chris": 0}
-    for it in combined.values():
+    julia = chris = 0
+    _parse = parse_iso_utc
+    # Completion stamps are UTC, so their 'YYYY-MM-DDTHH:MM:SS' prefix sorts like the instant
+    # itself: anything outside the window at second precision is rejected without parsing.
+    start_key = iso_utc(start_dt)[:19]
+    end_key = iso_utc(end_dt)[:19]
+    # Batch-completed chores share timestamps; parse each distinct string once per sweep
+    ts_cache: dict[str, datetime] = {}
+    for it in items:
+        # 'or' short-circuits: the legacy key is only looked up when completed_at is missing/empty
         raw = it.get("completed_at") or it.get("completed_date")
         if not raw:
             continue
-        ts = parse_iso_utc(raw)
+        key = raw[:19]
+        if key < start_key or key > end_key:
+            continue
+        ts = ts_cache.get(raw)
+        if ts is None:
+            ts = ts_cache[raw] = _parse(raw)
         if ts <= start_dt or ts > end_dt:
             continue
-        child = "Julia" if it.get("project_id") == julia_id else ("Chris" if it.get("project_id") == chris_id else None)
-        if child:
-            state["points"][child] += 1
-            added[child] += 1
+        pid = it.get("project_id")
+        if pid == julia_id:
+            julia += 1
+        elif pid == chris_id:
+            chris += 1
         if ts > max_seen:
             max_seen = ts
+    return julia, chris, max_seen
+
+def count_window(state: dict, start_dt: datetime, end_dt: datetime, julia_id: str, chris_id: str) -> dict:
+    """
+    Count completions in (start_dt, end_dt] for Julia & Chris (strictly after start_dt).
+    """
+    combined: dict[str, dict] = {
+        it["id"]: it for it in fetch_completed_multi(start_dt, end_dt, {julia_id, chris_id}) if it.get("id")
+    }
+
+    julia, chris, max_seen = tally(combined.values(), julia_id, chris_id, start_dt, end_dt)
+    state["points"]["Julia"] += julia
+    state["points"]["Chris"] += chris
 
     state["last_sync"] = iso_utc(max_seen)
-    print(f"[window] +Julia:{added['Julia']} +Chris:{added['Chris']} | last_sync={state['last_sync']}")
+    print(f"[window] +Julia:{julia} +Chris:{chris} | last_sync={state['last_sync']}")
     return state
 
 def rollover_if_due(state: dict, name_to_id: dict) -> dict:
@@ -180,10 +275,7 @@ def rollover_if_due(state: dict, name_to_id: dict) -> dict:
 
 def main():
     state = load_state(LEADERBOARD_PATH)
-    _, name_to_id = fetch_projects_maps()
-    for p in PROJECT_NAMES:
-        if p not in name_to_id:
-            raise RuntimeError(f"Project '{p}' not found in Todoist.")
+    name_to_id = cached_project_ids(state)
 
     # Rollover first (if boundary passed)
     state = rollover_if_due(state, name_to_id)
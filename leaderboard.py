@@ -1,52 +1,36 @@
+import os
 import json
+import platform
 from datetime import datetime, timezone
 from pathlib import Path
+from string import Template
 
 try:
     from zoneinfo import ZoneInfo  # Python 3.9+
 except ModuleNotFoundError:
     raise RuntimeError("This script requires Python 3.9+ (zoneinfo). Please upgrade Python.")
 
+try:
+    import orjson  # optional C-accelerated JSON
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+try:
+    import ijson  # optional streaming parser
+except ImportError:
+    ijson = None
+
 LEADERBOARD_PATH = Path("leaderboard.json")
 OUTPUT_PATH = Path("index.html")
 NY_TZ = ZoneInfo("America/New_York")
 
-def safe_get(d, path, default=0):
-    cur = d
-    for p in path:
-        if not isinstance(cur, dict) or p not in cur:
-            return default
-        cur = cur[p]
-    return cur
-
-def fmt_dt_et(iso_utc: str) -> str:
-    """Format an ISO UTC string as ET (e.g., 'Fri, Sep 26 11:59 PM ET')."""
-    try:
-        dt = datetime.fromisoformat(iso_utc.replace("Z", "+00:00")).astimezone(NY_TZ)
-        return dt.strftime("%a, %b %-d %I:%M %p ET") if hasattr(dt, "strftime") else dt.strftime("%a, %b %d %I:%M %p ET")
-    except Exception:
-        return iso_utc
-
-def fmt_timeago_utc(iso_utc: str) -> str:
-    """Human-ish relative time from now UTC."""
-    try:
-        now = datetime.now(timezone.utc)
-        then = datetime.fromisoformat(iso_utc.replace("Z", "+00:00"))
-        delta = now - then
-        secs = int(delta.total_seconds())
-        if secs < 60: return "just now"
-        mins = secs // 60
-        if mins < 60: return f"{mins} min ago"
-        hrs = mins // 60
-        if hrs < 24: return f"{hrs} hr ago"
-        days = hrs // 24
-        return f"{days} day{'s' if days!=1 else ''} ago"
-    except Exception:
-        return iso_utc
+# Day of month without zero padding: glibc/BSD use %-d, Windows uses %#d
+_DAY_FMT = "%#d" if platform.system() == "Windows" else "%-d"
+_DT_FMT_ET = f"%a, %b {_DAY_FMT} %I:%M %p ET"
+_TODAY_FMT = f"%a, %b {_DAY_FMT}"
 
-def main():
-    if not LEADERBOARD_PATH.exists():
-        html = """<!doctype html><html><head><meta charset="utf-8">
+_PLACEHOLDER_HTML = b"""<!doctype html><html><head><meta charset="utf-8">
 <title>Chore Leaderboard</title>
 <meta http-equiv="refresh" content="120">
 <style>
@@ -55,21 +39,9 @@ def main():
 </style></head><body>
 <div class="wrap"><h1>Chore Leaderboard</h1><p>No leaderboard.json found yet.</p></div>
 </body></html>"""
-        OUTPUT_PATH.write_text(html, encoding="utf-8")
-        print("index.html written (placeholder).")
-        return
-
-    data = json.loads(LEADERBOARD_PATH.read_text(encoding="utf-8"))
 
-    julia = safe_get(data, ["points", "Julia"], 0)
-    chris = safe_get(data, ["points", "Chris"], 0)
-    prev_julia = safe_get(data, ["previous_points", "Julia"], 0)
-    prev_chris = safe_get(data, ["previous_points", "Chris"], 0)
-
-    last_sync = data.get("last_sync", "")
-    next_reset = data.get("next_reset_utc", "")
-
-    html = f"""<!doctype html>
+# Static page shell, parsed once at import; main() only fills in the scores and times.
+_HTML_TEMPLATE = Template("""<!doctype html>
 <html lang="en">
 <head>
 <meta charset="utf-8">
@@ -77,14 +49,14 @@ def main():
 <meta name="viewport" content="width=device-width, initial-scale=1">
 <meta http-equiv="refresh" content="120">
 <style>
-  :root {{
+  :root {
     --card-bg: rgba(23, 26, 33, 0.85);
     --text-color: #eaeef5;
     --muted-color: #a8b3c7;
     --accent-chris: #7dd3fc;
     --accent-julia: #f472b6;
-  }}
-  html, body {{
+  }
+  html, body {
     margin: 0;
     padding: 0;
     background: transparent;
@@ -93,8 +65,8 @@ def main():
     overflow: hidden;
     font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif;
     color: var(--text-color);
-  }}
-  .wrap {{
+  }
+  .wrap {
     display: flex;
     flex-direction: column;
     align-items: center;
@@ -102,53 +74,53 @@ def main():
     padding: 2vh 2vw;
     width: 100%;
     height: 100%;
-  }}
-  h1 {{
+  }
+  h1 {
     font-size: 4vw;
     margin-bottom: 2vh;
     text-align: center;
-  }}
-  .meta {{
+  }
+  .meta {
     font-size: 1.8vw;
     color: var(--muted-color);
     margin-bottom: 2vh;
     text-align: center;
-  }}
-  .grid {{
+  }
+  .grid {
     display: grid;
     grid-template-columns: repeat(auto-fit, minmax(40vw, 1fr));
     gap: 2vw;
     width: 100%;
-  }}
-  .card {{
+  }
+  .card {
     background: var(--card-bg);
     border-radius: 1vw;
     padding: 2vh 2vw;
     display: flex;
     flex-direction: column;
     align-items: center;
-  }}
-  .name {{
+  }
+  .name {
     font-size: 2.5vw;
     font-weight: 700;
     margin-bottom: 1vh;
-  }}
-  .score {{
+  }
+  .score {
     font-size: 6vw;
     font-weight: 800;
-  }}
-  .julia .score {{
+  }
+  .julia .score {
     color: var(--accent-julia);
-  }}
-  .chris .score {{
+  }
+  .chris .score {
     color: var(--accent-chris);
-  }}
-  .sub {{
+  }
+  .sub {
     font-size: 1.8vw;
     color: var(--muted-color);
     margin-top: 1vh;
-  }}
-  .footer {{
+  }
+  .footer {
     margin-top: 3vh;
     font-size: 1.6vw;
     color: var(--muted-color);
@@ -156,65 +128,157 @@ def main():
     flex-wrap: wrap;
     gap: 1vw;
     justify-content: center;
-  }}
-  .pill {{
+  }
+  .pill {
     background: rgba(14, 16, 21, 0.7);
     padding: 0.5vh 1vw;
     border-radius: 999px;
-  }}
-  .bar-wrap {{
+  }
+  .bar-wrap {
     margin-top: 2vh;
     height: 1vh;
     width: 80%;
     background: rgba(14, 16, 21, 0.7);
     border-radius: 99px;
     overflow: hidden;
-  }}
-  .bar {{
+  }
+  .bar {
     height: 100%;
     width: 0%;
     background: linear-gradient(90deg, var(--accent-julia), var(--accent-chris));
     transition: width .5s ease;
-  }}
+  }
 </style>
 </head>
 <body>
   <div class="wrap">
     <h1>Weekly Chore Leaderboard</h1>
-    <div class="meta">Updated {fmt_timeago_utc(last_sync)} • Next reset: {fmt_dt_et(next_reset)}</div>
+    <div class="meta">Updated $updated • Next reset: $next_reset</div>
     <div class="grid">
       <div class="card julia">
         <div class="name">Julia</div>
-        <div class="score">{julia}</div>
-        <div class="sub">Previous week: {prev_julia}</div>
+        <div class="score">$julia</div>
+        <div class="sub">Previous week: $prev_julia</div>
       </div>
       <div class="card chris">
         <div class="name">Chris</div>
-        <div class="score">{chris}</div>
-        <div class="sub">Previous week: {prev_chris}</div>
+        <div class="score">$chris</div>
+        <div class="sub">Previous week: $prev_chris</div>
       </div>
     </div>
     <div class="bar-wrap"><div class="bar"></div></div>
     <div class="footer">
-      <span class="pill">Today is {datetime.now(NY_TZ).strftime("%a, %b %-d") if hasattr(datetime.now(NY_TZ), "strftime") else datetime.now(NY_TZ).strftime("%a, %b %d")}</span>
+      <span class="pill">Today is $today</span>
       <span class="pill">Times are shown in ET</span>
       <span class="pill">Page auto-refreshes every 2 minutes</span>
     </div>
   </div>
   <script>
-    (function() {{
-      const julia = {julia};
-      const chris = {chris};
+    (function() {
+      const julia = $julia;
+      const chris = $chris;
       const total = Math.max(julia + chris, 1);
       const pct = Math.round((julia / total) * 100);
       document.querySelector('.bar').style.width = pct + '%';
-    }})();
+    })();
   </script>
 </body>
 </html>
-"""
-    OUTPUT_PATH.write_text(html, encoding="utf-8")
-    print("index.html written.")
+""")
+
+def fmt_dt_et(iso_utc: str) -> str:
+    """Format an ISO UTC string as ET (e.g., 'Fri, Sep 26 11:59 PM ET')."""
+    dt = datetime.fromisoformat(iso_utc.replace("Z", "+00:00")).astimezone(NY_TZ)
+    return dt.strftime(_DT_FMT_ET)
+
+def fmt_timeago_utc(iso_utc: str, now: datetime | None = None) -> str:
+    """Human-ish relative time from now UTC (pass `now` to reuse the caller's clock read)."""
+    if now is None:
+        now = datetime.now(timezone.utc)
+    then = datetime.fromisoformat(iso_utc.replace("Z", "+00:00"))
+    delta = now - then
+    secs = int(delta.total_seconds())
+    if secs < 60: return "just now"
+    mins = secs // 60
+    if mins < 60: return f"{mins} min ago"
+    hrs = mins // 60
+    if hrs < 24: return f"{hrs} hr ago"
+    days = hrs // 24
+    return f"{days} day{'s' if days!=1 else ''} ago"
+
+def read_leaderboard(path: Path) -> dict:
+    """
+    Load the fields the page shows. With ijson the file is streamed and only the two
+    score maps and the two timestamps are materialized, however large the rest grows.
+    """
+    if ijson is None:
+        return _loads(path.read_bytes())
+    data = {"points": {}, "previous_points": {}}
+    with path.open("rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if event == "number":
+                section, _, child = prefix.partition(".")
+                if section in data and child and "." not in child:
+                    data[section][child] = value
+            elif event == "string" and prefix in ("last_sync", "next_reset_utc"):
+                data[prefix] = value
+    return data
+
+def write_if_changed(path: Path, payload: bytes) -> bool:
+    """Write payload unless the file already holds exactly these bytes (keeps mtime/ETag stable)."""
+    try:
+        if path.read_bytes() == payload:
+            return False
+    except FileNotFoundError:
+        pass
+    # Swap in a fully written temp file so the auto-refreshing page never reads a torn write
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+    return True
+
+def main():
+    if not LEADERBOARD_PATH.exists():
+        if write_if_changed(OUTPUT_PATH, _PLACEHOLDER_HTML):
+            print("index.html written (placeholder).")
+        else:
+            print("index.html unchanged (placeholder).")
+        return
+
+    data = read_leaderboard(LEADERBOARD_PATH)
+
+    points = data.get("points") or {}
+    prev = data.get("previous_points") or {}
+    julia = points.get("Julia", 0)
+    chris = points.get("Chris", 0)
+    prev_julia = prev.get("Julia", 0)
+    prev_chris = prev.get("Chris", 0)
+
+    last_sync = data.get("last_sync", "")
+    next_reset = data.get("next_reset_utc", "")
+
+    # Read the clock once per render
+    now_utc = datetime.now(timezone.utc)
+    now_et = now_utc.astimezone(NY_TZ)
+    today_str = now_et.strftime(_TODAY_FMT)
+
+    # Formatters assume well-formed timestamps; only missing ones are handled here
+    updated = fmt_timeago_utc(last_sync, now_utc) if last_sync else "unknown"
+    next_reset_str = fmt_dt_et(next_reset) if next_reset else "unknown"
+
+    html = _HTML_TEMPLATE.substitute(
+        julia=julia,
+        chris=chris,
+        prev_julia=prev_julia,
+        prev_chris=prev_chris,
+        updated=updated,
+        next_reset=next_reset_str,
+        today=today_str,
+    )
+    if write_if_changed(OUTPUT_PATH, html.encode("utf-8")):
+        print("index.html written.")
+    else:
+        print("index.html unchanged.")
 
 if __name__ == "__main__":
     main()
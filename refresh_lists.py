@@ -1,7 +1,19 @@
 import os
 import sys
+import re
+import json
 import requests
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from uuid import uuid4
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional C-accelerated JSON
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 API_TOKEN = os.getenv("TODOIST_API_KEY")
 if not API_TOKEN:
@@ -9,17 +21,34 @@ if not API_TOKEN:
     sys.exit(1)
 
 PROJECT_NAMES = ["Julia", "Chris"]
+SYNC_URL = "https://api.todoist.com/sync/v9/sync"  # batched writes (Sync API)
+SYNC_MAX_COMMANDS = 100  # Sync API limit per request
 
 headers = {
     "Authorization": f"Bearer {API_TOKEN}",
-    "Content-Type": "application/json"
 }
 
+# Keep-alive session so every Todoist call reuses one TLS connection, backing off
+# on 429/5xx (Sync commands are deduplicated by uuid, so the POST is retried too).
+SESSION = requests.Session()
+SESSION.headers.update(headers)
+SESSION.mount("https://", HTTPAdapter(
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"GET", "POST"}),
+    ),
+))
+
 # === Helpers ===
-RFC3339_FORMATS = [
-    "%Y-%m-%dT%H:%M:%S.%f%z",  # e.g., 2025-09-28T10:30:00.000000+00:00
-    "%Y-%m-%dT%H:%M:%S%z",     # e.g., 2025-09-28T10:30:00+00:00
-]
+# One compiled scan per period, checked in priority order (daily > weekly > monthly)
+_PERIOD_PATTERNS = (
+    ("daily", re.compile(r"every day|daily|every weekday")),
+    # Heuristic: if it mentions 'week' or a weekday name, treat as weekly
+    ("weekly", re.compile(r"week|monday|tuesday|wednesday|thursday|friday|saturday|sunday")),
+    ("monthly", re.compile(r"month")),
+)
 
 def parse_due_to_datetime(due: dict) -> datetime | None:
     """
@@ -31,19 +60,13 @@ def parse_due_to_datetime(due: dict) -> datetime | None:
     # Prefer exact datetime if present
     dt = due.get("datetime")
     if dt:
-        # Handle trailing 'Z' (UTC) by replacing with +00:00
+        # Handle trailing 'Z' (UTC) by replacing with +00:00 (only needed before Py 3.11)
         if dt.endswith("Z"):
-            dt = dt.replace("Z", "+00:00")
-        # Try parsing RFC3339-like strings
-        for fmt in RFC3339_FORMATS:
-            try:
-                return datetime.strptime(dt, fmt)
-            except ValueError:
-                pass
-        # Fallback: attempt fromisoformat (Py 3.11 handles +00:00 well)
+            dt = dt[:-1] + "+00:00"
+        # fromisoformat is C-implemented and covers the RFC3339 shapes Todoist sends
         try:
             return datetime.fromisoformat(dt)
-        except Exception:
+        except ValueError:
             return None
 
     # Fall back to date-only
@@ -66,68 +89,74 @@ def infer_period(due_string: str) -> str | None:
     if not due_string:
         return None
     s = due_string.lower()
-    if "every day" in s or "daily" in s or "every weekday" in s:
-        return "daily"
-    # Heuristic: if it mentions 'week' or a weekday name, treat as weekly
-    weekdays = ["monday","tuesday","wednesday","thursday","friday","saturday","sunday"]
-    if "week" in s or any(wd in s for wd in weekdays):
-        return "weekly"
-    if "month" in s:
-        return "monthly"
+    for period, pattern in _PERIOD_PATTERNS:
+        if pattern.search(s):
+            return period
     return None
 
+_PERIOD_DAYS = {"daily": 1, "weekly": 7, "monthly": 30}  # monthly approximated as 30 days
+
 def advance_to_next_period(start: datetime, period: str, today: datetime) -> datetime:
     """
     Advance start forward in whole period increments until >= today (date-wise).
     For monthly we approximate by 30 days (good enough for chores).
     """
-    next_dt = start
     # Only compare dates (ignore time for all-day recurrences)
-    while next_dt.date() < today.date():
-        if period == "daily":
-            next_dt += timedelta(days=1)
-        elif period == "weekly":
-            next_dt += timedelta(weeks=1)
-        elif period == "monthly":
-            next_dt += timedelta(days=30)  # simple approximation
-        else:
-            break
-    return next_dt
+    diff_days = (today.date() - start.date()).days
+    step = _PERIOD_DAYS.get(period)
+    if diff_days <= 0 or step is None:
+        return start
+    # Jump straight to the first whole period on/after today
+    jumps = -(-diff_days // step)
+    return start + timedelta(days=jumps * step)
 
 # === Todoist REST calls ===
-def get_project_id(name):
-    res = requests.get("https://api.todoist.com/rest/v2/projects", headers=headers)
+def get_project_ids() -> dict:
+    """Fetch the project list once and map name -> id."""
+    res = SESSION.get("https://api.todoist.com/rest/v2/projects")
     res.raise_for_status()
-    for project in res.json():
-        if project["name"] == name:
-            return project["id"]
-    return None
+    return {project["name"]: project["id"] for project in _loads(res.content)}
 
 def get_tasks(project_id):
     url = f"https://api.todoist.com/rest/v2/tasks?project_id={project_id}"
-    res = requests.get(url, headers=headers)
+    res = SESSION.get(url)
     res.raise_for_status()
-    return res.json()
+    return _loads(res.content)
+
+@lru_cache(maxsize=64)
+def _iso_date(d: date) -> str:
+    """YYYY-MM-DD for d; bulk resets land many tasks on the same day."""
+    return d.isoformat()
+
+def due_update_command(task_id, new_date: datetime, due_string: str) -> dict:
+    """
+    Sync API command that reschedules the task's next occurrence to an absolute
+    date (YYYY-MM-DD) without changing its recurrence pattern.
+    """
+    return {
+        "type": "item_update",
+        "uuid": str(uuid4()),
+        "args": {"id": task_id, "due": {"date": _iso_date(new_date.date()), "string": due_string}},
+    }
 
-def update_due_date(task_id, new_date: datetime, due_string: str) -> bool:
+def send_commands(commands: list[dict]) -> dict:
     """
-    Reschedule the task's next occurrence to an absolute date (YYYY-MM-DD)
-    without changing its recurrence pattern.
+    POST commands to the Sync API, SYNC_MAX_COMMANDS per request (one request in practice).
+    Returns sync_status: command uuid -> "ok" or an error object.
     """
-    url = f"https://api.todoist.com/rest/v2/tasks/{task_id}"
-    payload = {"due_date": new_date.strftime("%Y-%m-%d"), "due_string": due_string}
-    # Todoist expects POST for updates; success returns 204 No Content.
-    res = requests.post(url, headers=headers, json=payload)
-    if res.status_code not in (204, 200):
-        print(f"Failed to update task {task_id}: {res.status_code} - {res.text}")
-        return False
-    return True
+    sync_status = {}
+    for i in range(0, len(commands), SYNC_MAX_COMMANDS):
+        batch = commands[i:i + SYNC_MAX_COMMANDS]
+        res = SESSION.post(SYNC_URL, data={"commands": json.dumps(batch)})
+        res.raise_for_status()
+        sync_status.update(_loads(res.content).get("sync_status", {}))
+    return sync_status
 
 # === Core logic ===
-def get_next_due_datetime(task) -> datetime | None:
+def get_next_due_datetime(task, now_utc: datetime, now_naive: datetime) -> datetime | None:
     """
     If task is recurring & overdue, compute the next occurrence date we want to set.
-    Otherwise return None.
+    Otherwise return None. now_utc/now_naive are the run's clock, read once by the caller.
     """
     due_info = task.get("due")
     if not due_info:
@@ -137,47 +166,65 @@ def get_next_due_datetime(task) -> datetime | None:
     if not due_info.get("is_recurring"):
         return None
 
+    # Infer the period from due.string (e.g., "every day", "every Monday", etc.);
+    # this string check is cheaper than parsing the due date, so it goes first
+    period = infer_period(due_info.get("string", ""))
+    if not period:
+        return None
+
     current_due = parse_due_to_datetime(due_info)
     if not current_due:
         return None
 
     # Not overdue → skip
-    now = datetime.now(tz=current_due.tzinfo) if current_due.tzinfo else datetime.now()
+    now = now_utc.astimezone(current_due.tzinfo) if current_due.tzinfo else now_naive
     if current_due.date() >= now.date():
         return None
 
-    # Infer the period from due.string (e.g., "every day", "every Monday", etc.)
-    period = infer_period(due_info.get("string", ""))
-    if not period:
-        return None
-
     # Advance to today or next future date
     return advance_to_next_period(current_due, period, now)
 
 def reset_tasks():
-    grand_total = 0
+    commands = []
+    planned = []  # (project_name, task, next_due, command uuid)
+    found_projects = []
+    id_by_name = get_project_ids()
+    now_utc = datetime.now(timezone.utc)
+    now_naive = datetime.now()
     for project_name in PROJECT_NAMES:
-        project_id = get_project_id(project_name)
+        project_id = id_by_name.get(project_name)
         if not project_id:
             print(f"Project '{project_name}' not found.")
             continue
+        found_projects.append(project_name)
 
         tasks = get_tasks(project_id)
-        reset_count = 0
 
         for task in tasks:
-            next_due = get_next_due_datetime(task)
+            next_due = get_next_due_datetime(task, now_utc, now_naive)
             due_string = task.get("due", {}).get("string", "")
             print(f"{task['content']}-> due: {next_due}, recurrence: {due_string}")
             if next_due and due_string:
-                if update_due_date(task["id"], next_due, due_string):
-                    reset_count += 1
-                    print(f"[{project_name}] Rescheduled: {task['content']} → {next_due.date()}")
+                cmd = due_update_command(task["id"], next_due, due_string)
+                commands.append(cmd)
+                planned.append((project_name, task, next_due, cmd["uuid"]))
+
+    # One Sync API round-trip carries every update across all projects
+    sync_status = send_commands(commands)
+
+    reset_counts = dict.fromkeys(found_projects, 0)
+    for project_name, task, next_due, uuid in planned:
+        result = sync_status.get(uuid)
+        if result == "ok":
+            reset_counts[project_name] += 1
+            print(f"[{project_name}] Rescheduled: {task['content']} → {next_due.date()}")
+        else:
+            print(f"Failed to update task {task['id']}: {result}")
 
+    for project_name, reset_count in reset_counts.items():
         print(f"[{project_name}] Total tasks rescheduled: {reset_count}")
-        grand_total += reset_count
 
-    print(f"Grand total rescheduled: {grand_total}")
+    print(f"Grand total rescheduled: {sum(reset_counts.values())}")
 
 if __name__ == "__main__":
     reset_tasks()